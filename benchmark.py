@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the sorting visualizer
+
+The default suite runs every algorithm (visualized and frame-free) over a
+range of sizes and input distributions, times the sort, capture, render and
+encode stages separately with their tracemalloc peaks, and saves the results
+as JSON so runs from different commits can be compared:
+
+    python benchmark.py --output before.json
+    python benchmark.py --output after.json
+    python benchmark.py compare before.json after.json
+
+The other modes compare the matplotlib GIF export with the headless NumPy
+rasterizer (gif-export), measure how the parallel export scales with the
+number of workers (parallel-export) and compare the top-down and bottom-up
+merge sort engines (merge-engines).
+"""
+
+import matplotlib
+matplotlib.use('Agg')  # Use non-interactive backend
+
+from bubble_sort import BubbleSortVisualizer, MergeSortVisualizer, FrameRasterizer
+from frame_writers import GifWriter
+from sort_stats import bubble_sort_stats, merge_sort_stats
+import matplotlib.pyplot as plt
+import numpy as np
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime, timezone
+
+# Visualized engines run every stage; frame-free ones only have a sort stage
+VISUALIZERS = {
+    "bubble": lambda data: BubbleSortVisualizer(data),
+    "merge": lambda data: MergeSortVisualizer(data),
+    "merge_bottom_up": lambda data: MergeSortVisualizer(data, mode="bottom_up"),
+}
+FRAME_FREE = {
+    "bubble_stats": bubble_sort_stats,
+    "merge_stats": merge_sort_stats,
+    "merge_bottom_up_stats": lambda data: merge_sort_stats(data, mode="bottom_up"),
+}
+# Largest size each algorithm is run at; bubble sort is quadratic
+MAX_SIZES = {
+    "bubble": 2_000,
+    "merge": 100_000,
+    "merge_bottom_up": 100_000,
+    "bubble_stats": 1_000_000,
+    "merge_stats": 1_000_000,
+    "merge_bottom_up_stats": 1_000_000,
+}
+DISTRIBUTIONS = ("random", "sorted", "reversed", "nearly_sorted", "few_unique")
+DEFAULT_SIZES = (10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+def time_gif_export(visualizer, frames, renderer, filename):
+    """Export frames as a GIF with the given renderer and return the seconds taken"""
+    start_time = time.perf_counter()
+    visualizer.create_animation(frames, save_gif=True, filename=filename, renderer=renderer)
+    elapsed = time.perf_counter() - start_time
+    plt.close('all')
+    return elapsed
+
+def benchmark_gif_export(sizes=(32, 128), max_frames=100):
+    """Time GIF export of the first max_frames frames with both renderers"""
+    print("GIF Export Benchmark")
+    print("=" * 60)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for size in sizes:
+            data = list(np.random.randint(1, 1000, size))
+            for name, visualizer_class in (("bubble", BubbleSortVisualizer),
+                                           ("merge", MergeSortVisualizer)):
+                visualizer = visualizer_class(data)
+                frames = list(visualizer.record_steps())[:max_frames]
+
+                timings = {}
+                for renderer in ("matplotlib", "numpy"):
+                    filename = os.path.join(tmpdir, f"{name}_{size}_{renderer}.gif")
+                    timings[renderer] = time_gif_export(visualizer, frames, renderer, filename)
+                    timings[renderer + "_bytes"] = os.path.getsize(filename)
+
+                results.append((name, size, len(frames), timings))
+
+    print("\n" + "=" * 60)
+    print(f"{'Algorithm':<10} {'Size':>6} {'Frames':>7} {'matplotlib':>12} {'numpy':>10} {'Speedup':>9}")
+    for name, size, frame_count, timings in results:
+        speedup = timings["matplotlib"] / timings["numpy"]
+        print(f"{name:<10} {size:>6} {frame_count:>7} {timings['matplotlib']:>11.2f}s "
+              f"{timings['numpy']:>9.3f}s {speedup:>8.1f}x")
+    return results
+
+def benchmark_parallel_export(size=128, max_frames=4000, worker_counts=None):
+    """Time the headless GIF export of one bubble sort with different worker counts"""
+    worker_counts = worker_counts or sorted({1, 2, 4, os.cpu_count() or 1})
+    print("\nParallel Export Benchmark")
+    print("=" * 60)
+
+    data = list(np.random.randint(1, 1000, size))
+    visualizer = BubbleSortVisualizer(data)
+    frames = list(visualizer.bubble_sort())[:max_frames]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for workers in worker_counts:
+            filename = os.path.join(tmpdir, f"bubble_{workers}.gif")
+            start_time = time.perf_counter()
+            visualizer.export_gif(frames, filename, workers=workers)
+            results.append((workers, time.perf_counter() - start_time))
+
+    print(f"\n{len(frames)} frames, {size} elements ({os.cpu_count()} CPUs)")
+    print(f"{'Workers':>8} {'Time':>9} {'Speedup':>9}")
+    for workers, elapsed in results:
+        print(f"{workers:>8} {elapsed:>8.2f}s {results[0][1] / elapsed:>8.1f}x")
+    return results
+
+def benchmark_merge_engines(sizes=(1_000, 10_000, 100_000), repeats=3):
+    """
+    Time the merge sort engines without recording frames
+    Reports the best wall time, the tracemalloc peak and the temporary lists
+    each engine allocates: two slices per merge for top-down, one auxiliary
+    buffer for bottom-up.
+    """
+    print("\nMerge Sort Engine Benchmark")
+    print("=" * 60)
+    print(f"{'Mode':<10} {'Size':>8} {'Best time':>10} {'Peak memory':>12} {'Lists':>8}")
+
+    results = []
+    for size in sizes:
+        data = np.random.randint(1, 1000, size).tolist()
+        for mode in MergeSortVisualizer.MODES:
+            best = float("inf")
+            for _ in range(repeats):
+                visualizer = MergeSortVisualizer(data, mode=mode)
+                start_time = time.perf_counter()
+                deque(visualizer.iter_steps(), maxlen=0)
+                best = min(best, time.perf_counter() - start_time)
+
+            visualizer = MergeSortVisualizer(data, mode=mode)
+            tracemalloc.start()
+            deque(visualizer.iter_steps(), maxlen=0)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            lists = 2 * (size - 1) if mode == "top_down" else 1
+            results.append((mode, size, best, peak, lists))
+            print(f"{mode:<10} {size:>8} {best:>9.3f}s {peak / 1024:>10.1f}KB {lists:>8}")
+    return results
+
+def make_data(distribution, size, seed=0):
+    """Reproducible input array of the given distribution"""
+    rng = np.random.default_rng([seed, size, DISTRIBUTIONS.index(distribution)])
+    if distribution == "few_unique":
+        return rng.integers(1, 6, size)
+    data = rng.integers(1, 1000, size)
+    if distribution == "random":
+        return data
+    data.sort()
+    if distribution == "reversed":
+        return data[::-1].copy()
+    if distribution == "nearly_sorted":
+        # Swap about 1% of the elements with their right neighbour
+        swaps = rng.integers(0, max(size - 1, 1), max(size // 100, 1)) if size > 1 else []
+        for i in swaps:
+            data[i], data[i + 1] = data[i + 1], data[i]
+    return data
+
+def measure(stage, memory=True):
+    """
+    Run stage() and return (result, seconds, peak_bytes)
+    The timed run is untraced; with memory, a second run under tracemalloc
+    gives the peak. peak_bytes is None without memory.
+    """
+    start_time = time.perf_counter()
+    result = stage()
+    seconds = time.perf_counter() - start_time
+    peak = None
+    if memory:
+        tracemalloc.start()
+        stage()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, seconds, peak
+
+def run_case(algorithm, distribution, size, seed=0, max_frames=100, memory=True):
+    """Benchmark one algorithm on one input; returns a JSON-ready dict"""
+    data = make_data(distribution, size, seed)
+    result = {"algorithm": algorithm, "distribution": distribution, "size": size, "stages": {}}
+
+    def record(stage_name, stage):
+        value, seconds, peak = measure(stage, memory)
+        result["stages"][stage_name] = {"seconds": seconds, "peak_bytes": peak}
+        return value
+
+    if algorithm in FRAME_FREE:
+        result["counters"] = record("sort", lambda: FRAME_FREE[algorithm](data))
+        return result
+
+    make_visualizer = VISUALIZERS[algorithm]
+    values = data.tolist()
+
+    def sort_stage():
+        visualizer = make_visualizer(values)
+        deque(visualizer.iter_steps(), maxlen=0)
+        return visualizer
+
+    visualizer = record("sort", sort_stage)
+    result["counters"] = {name: getattr(visualizer, name)
+                          for name in ("comparisons", "swaps", "merges") if hasattr(visualizer, name)}
+
+    log = record("capture", lambda: make_visualizer(values).record_steps())
+    result["frames"] = len(log)
+    result["frame_bytes"] = log.nbytes
+
+    rasterizer = FrameRasterizer(size, int(data.max(initial=0)) + 2)
+    def render_stage():
+        return [rasterizer.render(frame[0], visualizer.frame_highlights(frame))
+                for frame in itertools.islice(log, max_frames)]
+    buffers = record("render", render_stage)
+    result["rendered_frames"] = len(buffers)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, "benchmark.gif")
+        def encode_stage():
+            with GifWriter(filename, rasterizer.width, rasterizer.height,
+                           rasterizer.PALETTE) as writer:
+                for buffer in buffers:
+                    writer.add_frame(buffer)
+            return os.path.getsize(filename)
+        result["encoded_bytes"] = record("encode", encode_stage)
+    return result
+
+def environment():
+    """Machine and code version the results were measured with"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "commit": commit or None,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+def run_suite(sizes=DEFAULT_SIZES, distributions=DISTRIBUTIONS, algorithms=None,
+              seed=0, max_frames=100, memory=True, output="benchmark_results.json"):
+    """Run every feasible (algorithm, distribution, size) case and save the results"""
+    algorithms = algorithms or list(VISUALIZERS) + list(FRAME_FREE)
+    print("Benchmark Suite")
+    print("=" * 60)
+
+    results = []
+    for algorithm in algorithms:
+        for size in sizes:
+            if size > MAX_SIZES[algorithm]:
+                continue
+            for distribution in distributions:
+                case = run_case(algorithm, distribution, size, seed, max_frames, memory)
+                results.append(case)
+                stages = ", ".join(f"{name} {stage['seconds']:.3f}s"
+                                   for name, stage in case["stages"].items())
+                print(f"{algorithm:<22} {distribution:<14} {size:>8}: {stages}")
+
+    report = {"environment": environment(), "seed": seed, "max_frames": max_frames,
+              "results": results}
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults saved to {output}")
+    return report
+
+def compare_results(baseline_file, current_file, threshold=1.2):
+    """
+    Print per-stage time ratios between two saved runs
+    Returns the number of stages that got slower than threshold
+    """
+    with open(baseline_file) as f:
+        baseline = json.load(f)
+    with open(current_file) as f:
+        current = json.load(f)
+
+    def keyed(report):
+        return {(case["algorithm"], case["distribution"], case["size"]): case
+                for case in report["results"]}
+    baseline_cases = keyed(baseline)
+
+    print(f"Comparing {current_file} against {baseline_file}")
+    print("=" * 60)
+    regressions = 0
+    for key, case in keyed(current).items():
+        if key not in baseline_cases:
+            continue
+        for stage, timing in case["stages"].items():
+            before = baseline_cases[key]["stages"].get(stage)
+            if not before or not before["seconds"]:
+                continue
+            ratio = timing["seconds"] / before["seconds"]
+            slower = ratio > threshold
+            regressions += slower
+            print(f"{key[0]:<22} {key[1]:<14} {key[2]:>8} {stage:<8} "
+                  f"{before['seconds']:>9.4f}s -> {timing['seconds']:>9.4f}s "
+                  f"{ratio:>6.2f}x{'  REGRESSION' if slower else ''}")
+    print(f"\n{regressions} stage(s) slower than {threshold:.2f}x")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sorting visualizer benchmarks")
+    parser.add_argument("mode", nargs="?", default="suite",
+                        choices=["suite", "compare", "gif-export", "parallel-export", "merge-engines"])
+    parser.add_argument("files", nargs="*", help="baseline and current JSON files for compare")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--distributions", nargs="+", choices=DISTRIBUTIONS, default=list(DISTRIBUTIONS))
+    parser.add_argument("--algorithms", nargs="+", choices=list(MAX_SIZES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-frames", type=int, default=100,
+                        help="frames rendered and encoded per case")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc runs")
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args(argv)
+
+    if args.mode == "compare":
+        if len(args.files) != 2:
+            parser.error("compare needs a baseline and a current results file")
+        return 1 if compare_results(*args.files) else 0
+    if args.mode == "gif-export":
+        benchmark_gif_export()
+    elif args.mode == "parallel-export":
+        benchmark_parallel_export()
+    elif args.mode == "merge-engines":
+        benchmark_merge_engines()
+    else:
+        run_suite(args.sizes, args.distributions, args.algorithms, args.seed,
+                  args.max_frames, not args.no_memory, args.output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,10 +2,512 @@ import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 import matplotlib.patches as patches
 import numpy as np
+import copy
 import time
-from typing import List, Tuple
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Tuple
+from frame_writers import GifWriter, encode_gif_frame
+from sort_stats import bubble_sort_stats, merge_sort_stats
+
+# Event opcodes stored in an OperationLog. Every event is a fixed-width
+# (op, a, b, c) record; COMPARE, SWAP and MARK each produce one frame.
+OP_COMPARE = 0  # highlight a, b, c without changing the array
+OP_SWAP = 1     # swap data[a] and data[b], then highlight a, b, c
+OP_WRITE = 2    # data[a] = b, no frame of its own
+OP_MARK = 3     # plain frame (e.g. "no swap" or "merge finished")
+
+# Flag OR-ed into a frame opcode when the frame is representative of the
+# sort's progress (end of a bubble sort pass, end of a merge). Frame budgets
+# prefer these frames when decimating.
+MILESTONE = 8
+OP_KIND = 7     # mask that strips the flags from an opcode
+
+
+def frame_limit(max_frames: Optional[int] = None, duration: Optional[float] = None,
+                fps: int = 5) -> Optional[int]:
+    """Combine a frame count and/or a duration in seconds into one frame budget"""
+    limits = []
+    if max_frames is not None:
+        limits.append(max(1, max_frames))
+    if duration is not None:
+        limits.append(max(1, int(duration * fps)))
+    return min(limits) if limits else None
+
+
+class FrameSampler:
+    """
+    Decides, one frame at a time, which frames fit into a frame budget.
+
+    Up to half of the budget goes to milestone frames and the rest is spread
+    evenly over all steps; totals may be estimates when the sort is streamed.
+    One frame is always held back for the final state, so at most `limit`
+    frames are produced.
+    """
+
+    def __init__(self, limit: int, total_frames: int, total_milestones: int):
+        self.limit = max(1, limit)
+        budget = self.limit - 1
+        milestone_budget = min(total_milestones, budget // 2)
+        self.milestone_stride = -(-total_milestones // milestone_budget) if milestone_budget else 0
+        # Whatever the milestones leave over goes to evenly spaced steps
+        step_budget = budget - (-(-total_milestones // self.milestone_stride) if milestone_budget else 0)
+        self.step_stride = -(-total_frames // step_budget) if step_budget else 0
+        self.frames = 0
+        self.milestones = 0
+        self.kept = 0
+
+    def keep(self, milestone: bool) -> bool:
+        """Whether the next frame should be materialized"""
+        take = bool(self.step_stride) and self.frames % self.step_stride == 0
+        self.frames += 1
+        if milestone:
+            take = take or (bool(self.milestone_stride) and
+                            self.milestones % self.milestone_stride == 0)
+            self.milestones += 1
+        if take and self.kept < self.limit - 1:
+            self.kept += 1
+            return True
+        return False
+
+
+def replay_frames(base, events: Iterable[Tuple[int, int, int, int]],
+                  highlights: int, sampler: Optional[FrameSampler] = None) -> Iterator[tuple]:
+    """
+    Rebuild animation frames by applying events to a copy of the base array
+    Yields tuples of (array_state, *highlight_indices). With a sampler, frames
+    it rejects are never copied; the final frame is always produced.
+    """
+    state = list(base)
+    skipped = None  # highlights of the last frame, if the sampler dropped it
+    for op, a, b, c in events:
+        kind = op & OP_KIND
+        if kind == OP_WRITE:
+            state[a] = b
+            continue
+        if kind == OP_SWAP:
+            state[a], state[b] = state[b], state[a]
+        if sampler is None or sampler.keep(op & MILESTONE):
+            skipped = None
+            yield (state.copy(), a, b, c)[:highlights + 1]
+        else:
+            skipped = (a, b, c)
+    if skipped is not None:
+        yield (state.copy(), *skipped)[:highlights + 1]
+
+
+class OperationLog:
+    """
+    Compact record of the steps taken by a sort.
+
+    Instead of keeping a full copy of the array for every frame, the log holds
+    one base snapshot plus flat (op, a, b, c) event records. Iterating the log
+    rebuilds the frames on demand, so it can be passed anywhere a list of
+    frames was expected.
+    """
+
+    RECORD_SIZE = 4
+
+    def __init__(self, base, highlights: int):
+        self.base = list(base)
+        self.highlights = highlights
+        self.events = array('q')
+        self.frame_count = 0
+        self.milestone_count = 0
+        self.max_frames = None
+
+    def record(self, op: int, a: int = -1, b: int = -1, c: int = -1):
+        """Append one event to the log"""
+        self.events.extend((op, a, b, c))
+        if op != OP_WRITE:
+            self.frame_count += 1
+            if op & MILESTONE:
+                self.milestone_count += 1
+
+    def iter_events(self) -> Iterator[Tuple[int, int, int, int]]:
+        """Iterate over the raw (op, a, b, c) event records"""
+        events = self.events
+        for pos in range(0, len(events), self.RECORD_SIZE):
+            yield events[pos], events[pos + 1], events[pos + 2], events[pos + 3]
+
+    def sampled(self, max_frames: Optional[int]) -> "OperationLog":
+        """
+        View of this log that yields at most max_frames representative frames
+        The events are shared, not copied; None returns the log itself.
+        """
+        if max_frames is None or max_frames >= self.frame_count:
+            return self
+        view = copy.copy(self)
+        view.max_frames = max_frames
+        return view
+
+    def _sampler(self) -> Optional[FrameSampler]:
+        if self.max_frames is None:
+            return None
+        return FrameSampler(self.max_frames, self.frame_count, self.milestone_count)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate size of the event storage in bytes"""
+        return self.events.itemsize * len(self.events)
+
+    def __len__(self) -> int:
+        sampler = self._sampler()
+        if sampler is None:
+            return self.frame_count
+        last_kept = True
+        for pos in range(0, len(self.events), self.RECORD_SIZE):
+            op = self.events[pos]
+            if op != OP_WRITE:
+                last_kept = sampler.keep(op & MILESTONE)
+        return sampler.kept + (not last_kept)
+
+    def __iter__(self) -> Iterator[tuple]:
+        return replay_frames(self.base, self.iter_events(), self.highlights, self._sampler())
+
+
+class BarChartRenderer:
+    """
+    Bar chart whose artists are created once and updated in place.
+
+    Bars, value labels, legend, grid and title are built a single time; each
+    frame only changes the heights and colors of the bars that differ from the
+    previous frame. update() returns the animated artists so FuncAnimation can
+    blit them. The time between consecutive frames is kept in frame_times.
+    """
+
+    LABEL_LIMIT = 50  # value labels are only drawn for arrays up to this size
+
+    def __init__(self, ax, data, ymax: float, title: str, legend: List[Tuple[str, str]]):
+        self.heights = np.asarray(data, dtype=float)
+        self.bars = list(ax.bar(range(len(data)), self.heights, color='gray'))
+        
+        # Add value labels on bars (only for smaller arrays)
+        self.labels = []
+        if len(data) <= self.LABEL_LIMIT:
+            for bar, val in zip(self.bars, data):
+                self.labels.append(ax.text(bar.get_x() + bar.get_width()/2., val + 0.1,
+                                           f'{val}', ha='center', va='bottom',
+                                           fontweight='bold', fontsize=8))
+        
+        # Counters live inside the axes so they are redrawn by blitting
+        self.counters = ax.text(0.01, 0.98, '', transform=ax.transAxes, ha='left',
+                                va='top', fontsize=12, fontweight='bold')
+        
+        ax.set_title(title, fontsize=14, fontweight='bold')
+        ax.set_xlabel('Array Index', fontsize=12)
+        ax.set_ylabel('Value', fontsize=12)
+        ax.set_ylim(0, ymax)
+        ax.grid(True, alpha=0.3)
+        ax.legend(handles=[patches.Rectangle((0,0),1,1, facecolor=color, label=label)
+                           for color, label in legend], loc='upper right')
+        
+        self.highlighted = []
+        self.frame_times = []
+        self._last_frame = None
+
+    @property
+    def artists(self) -> list:
+        """Every artist that changes between frames"""
+        return [*self.bars, *self.labels, self.counters]
+
+    def init(self) -> list:
+        """Initial draw for FuncAnimation: the artists as built"""
+        return self.artists
+
+    def update(self, data, highlights: Iterable[Tuple[int, str]], counter_text: str) -> list:
+        """
+        Bring the chart up to date with one frame
+        highlights: (index, color) pairs, later pairs win; negative indices are ignored
+        """
+        now = time.perf_counter()
+        if self._last_frame is not None:
+            self.frame_times.append(now - self._last_frame)
+        self._last_frame = now
+        
+        heights = np.asarray(data, dtype=float)
+        for i in np.flatnonzero(heights != self.heights):
+            self.bars[i].set_height(heights[i])
+            if self.labels:
+                self.labels[i].set_text(f'{data[i]}')
+                self.labels[i].set_y(heights[i] + 0.1)
+        self.heights = heights
+        
+        colors = {idx: color for idx, color in highlights if idx >= 0}
+        for i in self.highlighted:
+            if i not in colors:
+                self.bars[i].set_facecolor('gray')
+        for i, color in colors.items():
+            self.bars[i].set_facecolor(color)
+        self.highlighted = list(colors)
+        
+        self.counters.set_text(counter_text)
+        return self.artists
+
+    def print_timing(self):
+        """Print the average time spent per rendered frame"""
+        if not self.frame_times:
+            return
+        average = sum(self.frame_times) / len(self.frame_times)
+        print(f"Rendered {len(self.frame_times) + 1} frames: "
+              f"{average * 1000:.2f} ms/frame ({1 / average:.1f} frames/s)")
+
+
+class FrameRasterizer:
+    """
+    Headless bar-chart renderer that draws frames straight into uint8 images.
+
+    Every pixel column is mapped to one bar up front, so a frame is a single
+    vectorized column fill into a palette-indexed buffer. There is no figure,
+    no text and no per-frame color quantization: the buffers already use the
+    fixed PALETTE and can go directly to Pillow.
+    """
+
+    # Palette index 0 is the background; the rest match the matplotlib colors
+    PALETTE = [(255, 255, 255), (128, 128, 128), (0, 0, 255), (255, 0, 0), (0, 128, 0)]
+    COLOR_INDEX = {'white': 0, 'gray': 1, 'blue': 2, 'red': 3, 'green': 4}
+
+    def __init__(self, size: int, ymax: float, width: int = 800, height: int = 500):
+        self.size = size
+        self.width = width
+        self.height = height
+        self.scale = height / ymax if ymax > 0 else 0.0
+        
+        columns = np.arange(width)
+        self.bar_of_column = columns * max(size, 1) // width
+        # Leave a one pixel gap between bars when they are wide enough
+        self.gaps = np.zeros(width, dtype=bool)
+        if size and width / size >= 3:
+            self.gaps[1:] = self.bar_of_column[1:] != self.bar_of_column[:-1]
+        self.rows = np.arange(height)[:, None]
+
+    def render(self, data, highlights: Iterable[Tuple[int, str]]) -> np.ndarray:
+        """Draw one frame as a (height, width) array of palette indices"""
+        values = np.asarray(data, dtype=float)[self.bar_of_column] if self.size else np.zeros(self.width)
+        tops = self.height - np.clip(values * self.scale, 0, self.height).astype(np.intp)
+        
+        bar_colors = np.full(max(self.size, 1), self.COLOR_INDEX['gray'], dtype=np.uint8)
+        for idx, color in highlights:
+            if idx >= 0:
+                bar_colors[idx] = self.COLOR_INDEX[color]
+        column_colors = bar_colors[self.bar_of_column]
+        column_colors[self.gaps] = 0
+        
+        return np.where(self.rows >= tops, column_colors, 0).astype(np.uint8)
+
+
+def encode_frames(rasterizer: FrameRasterizer, frames: Iterable[tuple],
+                  previous: Optional[tuple] = None) -> Iterator[bytes]:
+    """
+    Rasterize and GIF-encode (data, highlights) frames
+    Each block only holds the region that changed since the frame before it;
+    `previous` is the frame preceding the first one, if any.
+    """
+    last = rasterizer.render(*previous) if previous is not None else None
+    for data, highlights in frames:
+        buffer = rasterizer.render(data, highlights)
+        yield encode_gif_frame(buffer, rasterizer.PALETTE, last)
+        last = buffer
+
+
+def _encode_chunk(rasterizer: FrameRasterizer, previous: Optional[tuple],
+                  chunk: List[tuple]) -> List[bytes]:
+    """Process pool task: encode one chunk of frames"""
+    return list(encode_frames(rasterizer, chunk, previous))
+
+
+def parallel_encode(rasterizer: FrameRasterizer, frames: Iterable[tuple],
+                    workers: int, chunk_size: int = 64) -> Iterator[bytes]:
+    """
+    Rasterize and encode (data, highlights) frames in a process pool
+    Frames are sent to the workers in chunks, together with the frame before
+    each chunk, and the encoded blocks come back in the original order, equal
+    to what encode_frames() produces serially. At most two chunks per worker
+    are in flight at a time.
+    """
+    def chunks():
+        previous, chunk = None, []
+        for frame in frames:
+            chunk.append(frame)
+            if len(chunk) == chunk_size:
+                yield previous, chunk
+                previous, chunk = chunk[-1], []
+        if chunk:
+            yield previous, chunk
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for previous, chunk in chunks():
+            pending.append(pool.submit(_encode_chunk, rasterizer, previous, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+class SortVisualizer:
+    """
+    Shared step-event plumbing for the sorting visualizers.
+
+    Subclasses implement iter_steps(), a generator that sorts self.data in
+    place, updates the counters and yields one (op, a, b, c) event per step.
+    The same generator feeds both the recorded OperationLog and the lazy
+    frame stream, so the two can never disagree.
+    """
+
+    HIGHLIGHTS = 0  # number of highlight indices carried by each frame
+
+    def iter_steps(self) -> Iterator[Tuple[int, int, int, int]]:
+        """Sort self.data in place, yielding one event per step"""
+        raise NotImplementedError
+
+    def estimated_frames(self) -> int:
+        """Upper bound on the number of frames the sort produces"""
+        raise NotImplementedError
+
+    def estimated_milestones(self) -> int:
+        """Upper bound on the number of milestone frames the sort produces"""
+        return max(len(self.data) - 1, 0)
+
+    def record_steps(self, max_frames: Optional[int] = None) -> OperationLog:
+        """
+        Run the sort to completion and return its OperationLog
+        With max_frames the log only yields that many representative frames
+        """
+        log = OperationLog(self.data, self.HIGHLIGHTS)
+        for op, a, b, c in self.iter_steps():
+            log.record(op, a, b, c)
+        self.frames = log
+        return log.sampled(max_frames)
+
+    def stream_frames(self, max_frames: Optional[int] = None) -> Iterator[tuple]:
+        """
+        Sort lazily, yielding each frame as soon as its step has run.
+        The returned generator is single-use: the sort advances as it is consumed.
+        With max_frames, frames are sampled against the estimated totals and
+        the skipped ones are never materialized.
+        """
+        sampler = None
+        if max_frames is not None:
+            sampler = FrameSampler(max_frames, self.estimated_frames(), self.estimated_milestones())
+        return replay_frames(list(self.data), self.iter_steps(), self.HIGHLIGHTS, sampler)
+
+    def apply_budget(self, frames: Iterable[tuple], max_frames: Optional[int]) -> Iterable[tuple]:
+        """
+        Limit any frame source to max_frames frames
+        Logs keep their milestone frames; lists are sampled evenly and streams
+        by a stride based on estimated_frames(), always ending on the last frame.
+        """
+        if max_frames is None:
+            return frames
+        if isinstance(frames, OperationLog):
+            return frames.sampled(max_frames)
+        if hasattr(frames, '__len__'):
+            total = len(frames)
+            if total <= max_frames:
+                return frames
+            return [frames[i] for i in np.linspace(0, total - 1, max_frames).round().astype(int)]
+        return self._sample_stream(frames, max(1, max_frames))
+
+    def _sample_stream(self, frames: Iterable[tuple], max_frames: int) -> Iterator[tuple]:
+        stride = -(-self.estimated_frames() // max_frames) or 1
+        kept, last = 0, None
+        for index, frame in enumerate(frames):
+            last = frame
+            if index % stride == 0 and kept < max_frames - 1:
+                kept += 1
+                last = None
+                yield frame
+        if last is not None:
+            yield last
+
+    def frame_highlights(self, frame: tuple) -> List[Tuple[int, str]]:
+        """(index, color) pairs to highlight for one frame"""
+        raise NotImplementedError
+
+    def counter_text(self) -> str:
+        """Counter line shown on the chart"""
+        raise NotImplementedError
+
+    def create_animation(self, frames: Iterable[tuple], save_gif: bool = False,
+                         filename: Optional[str] = None, blit: bool = True,
+                         renderer: str = "matplotlib", workers: Optional[int] = None,
+                         max_frames: Optional[int] = None, duration: Optional[float] = None,
+                         fps: int = 5):
+        """
+        Create and display animation of the sorting process
+        frames may be an OperationLog, a list of frames or a stream from
+        stream_frames(); a stream is consumed by the GIF export if save_gif is set
+        renderer="numpy" skips matplotlib entirely: nothing is displayed and
+        the GIF (if requested) is written by export_gif() using `workers` processes
+        max_frames and/or duration (seconds at fps) cap the number of frames drawn
+        """
+        filename = filename or self.GIF_FILENAME
+        frames = self.apply_budget(frames, frame_limit(max_frames, duration, fps))
+        if renderer == "numpy":
+            if save_gif:
+                self.export_gif(frames, filename, fps=fps, workers=workers)
+            return None
+        
+        fig, ax = plt.subplots(figsize=(16, 10))
+        self.renderer = BarChartRenderer(ax, self.original_data, max(self.original_data) + 2,
+                                         self.TITLE, self.LEGEND)
+        
+        def animate(frame_data):
+            return self.renderer.update(frame_data[0], self.frame_highlights(frame_data),
+                                        self.counter_text())
+        
+        # Create animation; init_func also stops FuncAnimation from pulling a
+        # frame off a stream before the animation (or GIF export) starts
+        anim = animation.FuncAnimation(fig, animate, frames=frames,
+                                       init_func=self.renderer.init,
+                                       interval=100, repeat=False, blit=blit,
+                                       cache_frame_data=False)
+        
+        if save_gif:
+            print(f"Saving animation to {filename}...")
+            anim.save(filename, writer='pillow', fps=fps)
+            print(f"Animation saved as {filename}")
+            self.renderer.print_timing()
+        
+        plt.tight_layout()
+        plt.show()
+        
+        return anim
+
+    def export_gif(self, frames: Iterable[tuple], filename: Optional[str] = None,
+                   fps: int = 5, width: int = 800, height: int = 500,
+                   workers: Optional[int] = None):
+        """
+        Write frames to a GIF with the headless NumPy rasterizer
+        With workers > 1 the frames are rasterized in a process pool; the
+        output is byte-identical to the serial export.
+        """
+        filename = filename or self.GIF_FILENAME
+        rasterizer = FrameRasterizer(len(self.original_data), max(self.original_data, default=0) + 2,
+                                     width, height)
+        frame_data = ((np.asarray(frame[0]), self.frame_highlights(frame)) for frame in frames)
+        if workers and workers > 1:
+            blocks = parallel_encode(rasterizer, frame_data, workers)
+        else:
+            blocks = encode_frames(rasterizer, frame_data)
+        
+        print(f"Saving animation to {filename}...")
+        with GifWriter(filename, width, height, rasterizer.PALETTE, fps=fps) as writer:
+            for block in blocks:
+                writer.add_encoded_frame(block)
+            if not writer.frames:
+                writer.add_frame(rasterizer.render(self.original_data, []))
+        print(f"Animation saved as {filename}")
+
+
+class BubbleSortVisualizer(SortVisualizer):
+    HIGHLIGHTS = 2  # (comparison_index, swap_index)
+    TITLE = 'Bubble Sort Visualization'
+    LEGEND = [('gray', 'Untouched'), ('blue', 'Comparing'), ('green', 'Swapping')]
+    GIF_FILENAME = "bubble_sort.gif"
 
-class BubbleSortVisualizer:
     def __init__(self, data: List[int]):
         self.data = data.copy()
         self.original_data = data.copy()
@@ -13,86 +515,52 @@ class BubbleSortVisualizer:
         self.comparisons = 0
         self.swaps = 0
         
-    def bubble_sort(self) -> List[Tuple[List[int], int, int]]:
+    def bubble_sort(self, max_frames: Optional[int] = None, duration: Optional[float] = None,
+                    fps: int = 5) -> OperationLog:
         """
         Perform bubble sort and record each step for visualization
-        Returns: List of tuples (array_state, comparison_index, swap_index)
+        max_frames and/or duration (seconds at fps) limit the frames to end-of-pass
+        frames plus evenly sampled steps
+        Returns: OperationLog whose frames are (array_state, comparison_index, swap_index)
         """
+        return self.record_steps(frame_limit(max_frames, duration, fps))
+    
+    def estimated_frames(self) -> int:
+        # Two frames per comparison, n(n-1)/2 comparisons at worst
         n = len(self.data)
-        frames = []
+        return n * (n - 1)
+    
+    def iter_steps(self) -> Iterator[Tuple[int, int, int, int]]:
+        """Bubble sort self.data in place, yielding one event per step"""
+        data = self.data
+        n = len(data)
         
         for i in range(n):
             swapped = False
             for j in range(0, n - i - 1):
                 self.comparisons += 1
-                frames.append((self.data.copy(), j, -1))  # Comparison frame
+                yield OP_COMPARE, j, -1, -1  # Comparison frame
                 
-                if self.data[j] > self.data[j + 1]:
+                # The last frame of each pass is a milestone
+                flag = MILESTONE if j == n - i - 2 else 0
+                if data[j] > data[j + 1]:
                     # Swap elements
-                    self.data[j], self.data[j + 1] = self.data[j + 1], self.data[j]
+                    data[j], data[j + 1] = data[j + 1], data[j]
                     self.swaps += 1
-                    frames.append((self.data.copy(), j, j + 1))  # Swap frame
+                    yield OP_SWAP | flag, j, j + 1, -1  # Swap frame
                     swapped = True
                 else:
-                    frames.append((self.data.copy(), j, -1))  # No swap frame
+                    yield OP_MARK | flag, j, -1, -1  # No swap frame
             
             if not swapped:
                 break
-                
-        return frames
     
-    def create_animation(self, frames: List[Tuple[List[int], int, int]], 
-                        save_gif: bool = False, filename: str = "bubble_sort.gif"):
-        """
-        Create and display animation of the bubble sort process
-        """
-        fig, ax = plt.subplots(figsize=(16, 10))
-        
-        def animate(frame_data):
-            ax.clear()
-            data, comp_idx, swap_idx = frame_data
-            
-            # Create bar chart with updated color scheme
-            bars = ax.bar(range(len(data)), data, 
-                         color=['blue' if i == comp_idx else 
-                               'green' if i == swap_idx else 
-                               'gray' for i in range(len(data))])
-            
-            # Add value labels on bars (only for smaller arrays)
-            if len(data) <= 50:
-                for i, (bar, val) in enumerate(zip(bars, data)):
-                    height = bar.get_height()
-                    ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                           f'{val}', ha='center', va='bottom', fontweight='bold', fontsize=8)
-            
-            ax.set_title(f'Bubble Sort Visualization\nComparisons: {self.comparisons} | Swaps: {self.swaps}', 
-                        fontsize=14, fontweight='bold')
-            ax.set_xlabel('Array Index', fontsize=12)
-            ax.set_ylabel('Value', fontsize=12)
-            ax.set_ylim(0, max(self.original_data) + 2)
-            ax.grid(True, alpha=0.3)
-            
-            # Add legend with updated colors
-            legend_elements = [
-                patches.Rectangle((0,0),1,1, facecolor='gray', label='Untouched'),
-                patches.Rectangle((0,0),1,1, facecolor='blue', label='Comparing'),
-                patches.Rectangle((0,0),1,1, facecolor='green', label='Swapping')
-            ]
-            ax.legend(handles=legend_elements, loc='upper right')
-            
-        # Create animation
-        anim = animation.FuncAnimation(fig, animate, frames=frames, 
-                                     interval=100, repeat=False, blit=False)
-        
-        if save_gif:
-            print(f"Saving animation to {filename}...")
-            anim.save(filename, writer='pillow', fps=5)
-            print(f"Animation saved as {filename}")
-        
-        plt.tight_layout()
-        plt.show()
-        
-        return anim
+    def frame_highlights(self, frame: tuple) -> List[Tuple[int, str]]:
+        _, comp_idx, swap_idx = frame
+        return [(swap_idx, 'green'), (comp_idx, 'blue')]
+    
+    def counter_text(self) -> str:
+        return f'Comparisons: {self.comparisons} | Swaps: {self.swaps}'
     
     def print_sorting_info(self):
         """Print information about the sorting process"""
@@ -108,22 +576,48 @@ class BubbleSortVisualizer:
         print(f"Space complexity: O(1)")
         print("=" * 50)
 
-class MergeSortVisualizer:
-    def __init__(self, data: List[int]):
+class MergeSortVisualizer(SortVisualizer):
+    HIGHLIGHTS = 3  # (left_idx, right_idx, merge_idx)
+    TITLE = 'Merge Sort Visualization'
+    LEGEND = [('gray', 'Untouched'), ('blue', 'Left Element'),
+              ('red', 'Right Element'), ('green', 'Merging')]
+    GIF_FILENAME = "merge_sort.gif"
+    MODES = ("top_down", "bottom_up")
+
+    def __init__(self, data: List[int], mode: str = "top_down"):
+        """
+        mode selects the engine: "top_down" recursive merge sort or "bottom_up"
+        iterative merge sort with a single preallocated ping-pong buffer
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown merge sort mode {mode!r}, expected one of {self.MODES}")
         self.data = data.copy()
         self.original_data = data.copy()
+        self.mode = mode
         self.frames = []
         self.comparisons = 0
         self.merges = 0
         
-    def merge_sort(self) -> List[Tuple[List[int], int, int, int]]:
+    def merge_sort(self, max_frames: Optional[int] = None, duration: Optional[float] = None,
+                   fps: int = 5) -> OperationLog:
         """
         Perform merge sort and record each step for visualization
-        Returns: List of tuples (array_state, left_idx, right_idx, merge_idx)
+        max_frames and/or duration (seconds at fps) limit the frames to end-of-merge
+        frames plus evenly sampled steps
+        Returns: OperationLog whose frames are (array_state, left_idx, right_idx, merge_idx)
         """
-        self.frames = []
-        self._merge_sort_recursive(0, len(self.data) - 1)
-        return self.frames
+        return self.record_steps(frame_limit(max_frames, duration, fps))
+    
+    def estimated_frames(self) -> int:
+        # At most n comparisons per level plus one frame per merge
+        n = len(self.data)
+        return n * max(n - 1, 0).bit_length() + max(n - 1, 0)
+    
+    def iter_steps(self) -> Iterator[Tuple[int, int, int, int]]:
+        """Merge sort self.data in place, yielding one event per step"""
+        if self.mode == "bottom_up":
+            return self._merge_sort_bottom_up()
+        return self._merge_sort_recursive(0, len(self.data) - 1)
     
     def _merge_sort_recursive(self, left: int, right: int):
         """Recursive merge sort implementation"""
@@ -131,14 +625,14 @@ class MergeSortVisualizer:
             mid = (left + right) // 2
             
             # Recursively sort left and right halves
-            self._merge_sort_recursive(left, mid)
-            self._merge_sort_recursive(mid + 1, right)
+            yield from self._merge_sort_recursive(left, mid)
+            yield from self._merge_sort_recursive(mid + 1, right)
             
             # Merge the sorted halves
-            self._merge(left, mid, right)
+            yield from self._merge(left, mid, right)
     
     def _merge(self, left: int, mid: int, right: int):
-        """Merge two sorted subarrays"""
+        """Merge two sorted subarrays, yielding one event per step"""
         left_half = self.data[left:mid + 1]
         right_half = self.data[mid + 1:right + 1]
         
@@ -147,7 +641,7 @@ class MergeSortVisualizer:
         
         while i < len(left_half) and j < len(right_half):
             self.comparisons += 1
-            self.frames.append((self.data.copy(), left + i, mid + 1 + j, k))
+            yield OP_COMPARE, left + i, mid + 1 + j, k
             
             if left_half[i] <= right_half[j]:
                 self.data[k] = left_half[i]
@@ -155,82 +649,97 @@ class MergeSortVisualizer:
             else:
                 self.data[k] = right_half[j]
                 j += 1
+            yield OP_WRITE, k, self.data[k], -1
             k += 1
             self.merges += 1
         
         # Copy remaining elements
         while i < len(left_half):
             self.data[k] = left_half[i]
+            yield OP_WRITE, k, self.data[k], -1
             i += 1
             k += 1
             self.merges += 1
         
         while j < len(right_half):
             self.data[k] = right_half[j]
+            yield OP_WRITE, k, self.data[k], -1
             j += 1
             k += 1
             self.merges += 1
         
-        self.frames.append((self.data.copy(), -1, -1, -1))
+        yield OP_MARK | MILESTONE, -1, -1, -1
     
-    def create_animation(self, frames: List[Tuple[List[int], int, int, int]], 
-                        save_gif: bool = False, filename: str = "merge_sort.gif"):
+    def _merge_sort_bottom_up(self):
         """
-        Create and display animation of the merge sort process
+        Iterative merge sort: merge runs of width 1, 2, 4, ... from one buffer
+        into the other, swapping the roles of self.data and a single auxiliary
+        buffer after every pass instead of slicing on every merge
         """
-        fig, ax = plt.subplots(figsize=(16, 10))
+        data = self.data
+        n = len(data)
+        src, dst = data, [None] * n
         
-        def animate(frame_data):
-            ax.clear()
-            data, left_idx, right_idx, merge_idx = frame_data
-            
-            # Create bar chart with merge sort color scheme
-            colors = ['gray'] * len(data)
-            if left_idx >= 0:
-                colors[left_idx] = 'blue'  # Left element being compared
-            if right_idx >= 0:
-                colors[right_idx] = 'red'  # Right element being compared
-            if merge_idx >= 0:
-                colors[merge_idx] = 'green'  # Element being merged
-            
-            bars = ax.bar(range(len(data)), data, color=colors)
-            
-            # Add value labels on bars (only for smaller arrays)
-            if len(data) <= 50:
-                for i, (bar, val) in enumerate(zip(bars, data)):
-                    height = bar.get_height()
-                    ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                           f'{val}', ha='center', va='bottom', fontweight='bold', fontsize=8)
-            
-            ax.set_title(f'Merge Sort Visualization\nComparisons: {self.comparisons} | Merges: {self.merges}', 
-                        fontsize=14, fontweight='bold')
-            ax.set_xlabel('Array Index', fontsize=12)
-            ax.set_ylabel('Value', fontsize=12)
-            ax.set_ylim(0, max(self.original_data) + 2)
-            ax.grid(True, alpha=0.3)
-            
-            # Add legend for merge sort
-            legend_elements = [
-                patches.Rectangle((0,0),1,1, facecolor='gray', label='Untouched'),
-                patches.Rectangle((0,0),1,1, facecolor='blue', label='Left Element'),
-                patches.Rectangle((0,0),1,1, facecolor='red', label='Right Element'),
-                patches.Rectangle((0,0),1,1, facecolor='green', label='Merging')
-            ]
-            ax.legend(handles=legend_elements, loc='upper right')
+        width = 1
+        while width < n:
+            for left in range(0, n, 2 * width):
+                mid = min(left + width, n)
+                right = min(left + 2 * width, n)
+                if mid < right:
+                    yield from self._merge_runs(src, dst, left, mid, right)
+                else:
+                    # A run without a partner is carried over unchanged
+                    for k in range(left, right):
+                        dst[k] = src[k]
+            src, dst = dst, src
+            width *= 2
+        
+        if src is not data:
+            # Element-wise, as slice assignment would allocate another n-item buffer
+            for k in range(n):
+                data[k] = src[k]
+    
+    def _merge_runs(self, src: list, dst: list, left: int, mid: int, right: int):
+        """Merge src[left:mid] and src[mid:right] into dst[left:right], yielding one event per step"""
+        i, j, k = left, mid, left
+        
+        while i < mid and j < right:
+            self.comparisons += 1
+            yield OP_COMPARE, i, j, k
             
-        # Create animation
-        anim = animation.FuncAnimation(fig, animate, frames=frames, 
-                                     interval=100, repeat=False, blit=False)
+            if src[i] <= src[j]:
+                dst[k] = src[i]
+                i += 1
+            else:
+                dst[k] = src[j]
+                j += 1
+            yield OP_WRITE, k, dst[k], -1
+            k += 1
+            self.merges += 1
         
-        if save_gif:
-            print(f"Saving animation to {filename}...")
-            anim.save(filename, writer='pillow', fps=5)
-            print(f"Animation saved as {filename}")
+        # Copy remaining elements
+        while i < mid:
+            dst[k] = src[i]
+            yield OP_WRITE, k, dst[k], -1
+            i += 1
+            k += 1
+            self.merges += 1
         
-        plt.tight_layout()
-        plt.show()
+        while j < right:
+            dst[k] = src[j]
+            yield OP_WRITE, k, dst[k], -1
+            j += 1
+            k += 1
+            self.merges += 1
         
-        return anim
+        yield OP_MARK | MILESTONE, -1, -1, -1
+    
+    def frame_highlights(self, frame: tuple) -> List[Tuple[int, str]]:
+        _, left_idx, right_idx, merge_idx = frame
+        return [(left_idx, 'blue'), (right_idx, 'red'), (merge_idx, 'green')]
+    
+    def counter_text(self) -> str:
+        return f'Comparisons: {self.comparisons} | Merges: {self.merges}'
     
     def print_sorting_info(self):
         """Print information about the sorting process"""
@@ -286,8 +795,18 @@ def interactive_sorting():
         print("Invalid choice. Running both algorithms...")
         run_comparison_demo(data, save_gif)
 
-def run_comparison_demo(data, save_gif=False):
-    """Run both algorithms on the same data for comparison"""
+def run_comparison_demo(data, save_gif=False, workers=None, stats_only=False):
+    """
+    Run both algorithms on the same data for comparison
+    With workers set, GIFs are exported headlessly by that many processes
+    With stats_only, only the performance comparison is printed; its counters
+    come from sort_stats, so no sort is visualized and no frames are made
+    """
+    if stats_only:
+        print_performance_comparison(len(data), bubble_sort_stats(data), merge_sort_stats(data))
+        return
+    
+    renderer = "numpy" if workers else "matplotlib"
     print(f"\nComparing algorithms on array of size {len(data)}")
     print("=" * 60)
     
@@ -295,28 +814,38 @@ def run_comparison_demo(data, save_gif=False):
     print("\n1. Running Bubble Sort...")
     bubble_viz = BubbleSortVisualizer(data)
     bubble_frames = bubble_viz.bubble_sort()
-    bubble_viz.create_animation(bubble_frames, save_gif=save_gif, filename="bubble_sort_comparison.gif")
+    bubble_viz.create_animation(bubble_frames, save_gif=save_gif, filename="bubble_sort_comparison.gif",
+                                renderer=renderer, workers=workers)
     bubble_viz.print_sorting_info()
     
     # Merge Sort
     print("\n2. Running Merge Sort...")
     merge_viz = MergeSortVisualizer(data)
     merge_frames = merge_viz.merge_sort()
-    merge_viz.create_animation(merge_frames, save_gif=save_gif, filename="merge_sort_comparison.gif")
+    merge_viz.create_animation(merge_frames, save_gif=save_gif, filename="merge_sort_comparison.gif",
+                               renderer=renderer, workers=workers)
     merge_viz.print_sorting_info()
     
-    # Performance comparison
+    print_performance_comparison(len(data),
+                                 {"comparisons": bubble_viz.comparisons, "swaps": bubble_viz.swaps},
+                                 {"comparisons": merge_viz.comparisons, "merges": merge_viz.merges})
+
+def print_performance_comparison(size, bubble_stats, merge_stats):
+    """Print the bubble sort vs merge sort counters side by side"""
     print("\n" + "=" * 60)
     print("PERFORMANCE COMPARISON")
     print("=" * 60)
-    print(f"Array size: {len(data)}")
-    print(f"Bubble Sort - Comparisons: {bubble_viz.comparisons}, Swaps: {bubble_viz.swaps}")
-    print(f"Merge Sort  - Comparisons: {merge_viz.comparisons}, Merges: {merge_viz.merges}")
-    print(f"Bubble Sort complexity: O(n²) = O({len(data)}²) = O({len(data)**2})")
-    print(f"Merge Sort  complexity: O(n log n) = O({len(data)} log {len(data)}) ≈ O({len(data) * np.log2(len(data)):.0f})")
-
-def demo_sorting_algorithms():
-    """Run demonstrations with predefined arrays including 128 elements"""
+    print(f"Array size: {size}")
+    print(f"Bubble Sort - Comparisons: {bubble_stats['comparisons']}, Swaps: {bubble_stats['swaps']}")
+    print(f"Merge Sort  - Comparisons: {merge_stats['comparisons']}, Merges: {merge_stats['merges']}")
+    print(f"Bubble Sort complexity: O(n²) = O({size}²) = O({size**2})")
+    print(f"Merge Sort  complexity: O(n log n) = O({size} log {size}) ≈ O({size * np.log2(size):.0f})")
+
+def demo_sorting_algorithms(workers=None):
+    """
+    Run demonstrations with predefined arrays including 128 elements
+    With workers set, GIFs are exported headlessly by that many processes
+    """
     print("Sorting Algorithm Demo")
     print("-" * 20)
     
@@ -332,7 +861,7 @@ def demo_sorting_algorithms():
         print(f"Sample data: {data[:5]}{'...' if len(data) > 5 else ''}")
         
         # Run both algorithms
-        run_comparison_demo(data, save_gif=True)
+        run_comparison_demo(data, save_gif=True, workers=workers)
         time.sleep(2)
 
 if __name__ == "__main__":
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Animated image writers for palette frames
+Frames are encoded one at a time with a fixed global palette, so an
+animation can be written while it is being produced and individual frames
+can be encoded in other processes and concatenated later.
+"""
+
+import io
+import struct
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+def _flat_palette(palette: Sequence[Tuple[int, int, int]], entries: int) -> bytes:
+    """Palette as packed RGB bytes, padded with black to the given entry count"""
+    flat = bytes(channel for rgb in palette for channel in rgb)
+    return flat + bytes(3 * (entries - len(palette)))
+
+def _palette_bits(palette: Sequence[Tuple[int, int, int]]) -> int:
+    """Smallest GIF color table size (as a power of two) that holds the palette"""
+    bits = 1
+    while (1 << bits) < len(palette):
+        bits += 1
+    return bits
+
+def changed_region(buffer: np.ndarray, previous: Optional[np.ndarray]) -> Tuple[int, int, int, int]:
+    """
+    Bounding box (left, top, right, bottom) of the pixels that differ from previous
+    The whole frame is returned when there is no previous frame and a single
+    pixel when nothing changed, since every frame needs an image of its own.
+    """
+    height, width = buffer.shape
+    if previous is None:
+        return 0, 0, width, height
+    diff = buffer != previous
+    rows = np.flatnonzero(diff.any(axis=1))
+    if not len(rows):
+        return 0, 0, 1, 1
+    cols = np.flatnonzero(diff[rows[0]:rows[-1] + 1].any(axis=0))
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+
+def encode_gif_frame(buffer: np.ndarray, palette: Sequence[Tuple[int, int, int]],
+                     previous: Optional[np.ndarray] = None) -> bytes:
+    """
+    Encode a (height, width) uint8 palette-index buffer as a GIF image block
+    Only the region that changed since `previous` is encoded. Returns the image
+    descriptor plus LZW data without any color table, so the block can be
+    placed in a file that carries palette as its global table.
+    """
+    from PIL import Image
+    left, top, right, bottom = changed_region(buffer, previous)
+    image = Image.fromarray(np.ascontiguousarray(buffer[top:bottom, left:right]), mode='P')
+    image.putpalette(_flat_palette(palette, len(palette)))
+    out = io.BytesIO()
+    image.save(out, format='GIF', optimize=False)
+    block = bytearray(_gif_image_block(out.getvalue()))
+    block[1:5] = struct.pack('<HH', left, top)
+    return bytes(block)
+
+def _gif_image_block(gif: bytes) -> bytes:
+    """Cut the first image descriptor and its data sub-blocks out of a GIF file"""
+    pos = 13
+    flags = gif[10]
+    if flags & 0x80:
+        pos += 3 << ((flags & 0x07) + 1)
+
+    # Skip extensions (graphic control, comments, ...)
+    while gif[pos] == 0x21:
+        pos += 2
+        while gif[pos]:
+            pos += gif[pos] + 1
+        pos += 1
+    if gif[pos] != 0x2C:
+        raise ValueError("GIF data does not contain an image descriptor")
+
+    descriptor = bytearray(gif[pos:pos + 10])
+    pos += 10
+    if descriptor[9] & 0x80:
+        pos += 3 << ((descriptor[9] & 0x07) + 1)
+    descriptor[9] &= 0x40  # keep only the interlace flag, drop the local table
+
+    end = pos + 1  # LZW minimum code size
+    while gif[end]:
+        end += gif[end] + 1
+    return bytes(descriptor) + gif[pos:end + 1]
+
+class GifWriter:
+    """
+    Streaming animated GIF writer with a fixed global palette
+
+    Frames are written to the file as soon as they are added, so memory use
+    does not grow with the length of the animation.
+    """
+
+    def __init__(self, filename: str, width: int, height: int,
+                 palette: Sequence[Tuple[int, int, int]], fps: int = 5, loop: int = 0):
+        self.palette = list(palette)
+        self.delay = max(1, round(100 / fps))  # GIF delays are in 1/100 s
+        self.frames = 0
+        self.previous = None
+        self.file = open(filename, 'wb')
+
+        bits = _palette_bits(self.palette)
+        self.file.write(b'GIF89a')
+        self.file.write(struct.pack('<HHBBB', width, height, 0xF0 | (bits - 1), 0, 0))
+        self.file.write(_flat_palette(self.palette, 1 << bits))
+        self.file.write(b'!\xff\x0bNETSCAPE2.0\x03\x01' + struct.pack('<H', loop) + b'\x00')
+
+    def add_frame(self, buffer: np.ndarray):
+        """Encode and write one palette-index buffer"""
+        self.add_encoded_frame(encode_gif_frame(buffer, self.palette, self.previous))
+        self.previous = buffer
+
+    def add_encoded_frame(self, block: bytes):
+        """
+        Write an image block produced by encode_gif_frame
+        Blocks are drawn over the previous frame (disposal method 1).
+        """
+        self.file.write(b'!\xf9\x04\x04' + struct.pack('<H', self.delay) + b'\x00\x00')
+        self.file.write(block)
+        self.frames += 1
+
+    def close(self):
+        """Write the trailer and close the file"""
+        if not self.file.closed:
+            self.file.write(b';')
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
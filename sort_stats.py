@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Frame-free sorting analytics
+Computes the counters reported by BubbleSortVisualizer and MergeSortVisualizer
+(comparisons, swaps, merges) without running the visualized sorts, so they
+can be reported for arrays with millions of elements.
+"""
+
+import numpy as np
+
+def _ranges(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Concatenation of arange(start, start + length) for every pair"""
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+
+def left_greater_counts(data) -> np.ndarray:
+    """
+    For every element, the number of earlier elements strictly greater than it
+    Merge-based: each level pairs up blocks of `width` elements and counts, for
+    every element of a right block, the larger elements of its left block.
+    """
+    ranks = np.unique(np.asarray(data), return_inverse=True)[1].astype(np.int64).ravel()
+    n = len(ranks)
+    counts = np.zeros(n, dtype=np.int64)
+    index = np.arange(n, dtype=np.int64)
+    rank_span = int(ranks.max()) + 1 if n else 1
+
+    width = 1
+    while width < n:
+        pair = index // (2 * width)
+        is_right = (index // width) & 1
+        # Within a pair sort by value, left elements before right ones on ties
+        order = np.argsort((pair * rank_span + ranks) * 2 + is_right, kind='stable')
+        right_sorted = is_right[order].astype(bool)
+        # Left elements of the same pair that are <= each element; earlier pairs
+        # each contribute exactly `width` left elements
+        left_not_greater = np.cumsum(~right_sorted) - pair[order] * width
+        counts[order[right_sorted]] += width - left_not_greater[right_sorted]
+        width *= 2
+    return counts
+
+def bubble_sort_stats(data) -> dict:
+    """
+    Counters of BubbleSortVisualizer.bubble_sort for data, in O(n log n)
+    Every pass moves each element left by at most one position, so the number
+    of passes that swap is the largest count of greater elements preceding any
+    element, and the swaps are the inversions.
+    """
+    n = len(data)
+    if n == 0:
+        return {"comparisons": 0, "swaps": 0, "passes": 0}
+    counts = left_greater_counts(data)
+    passes = int(counts.max()) + 1  # the last pass finds nothing to swap
+    comparisons = passes * (n - 1) - passes * (passes - 1) // 2
+    return {"comparisons": comparisons, "swaps": int(counts.sum()), "passes": passes}
+
+def _merge_level_stats(values: np.ndarray, left: np.ndarray, len_a: np.ndarray,
+                       len_b: np.ndarray) -> tuple:
+    """
+    Comparisons and writes of merging values[left:left+len_a] with the len_b
+    elements that follow it, for many independent merges at once
+    A merge of A and B stops once one side runs out, so it costs
+    len(A) + #{b < max(A)} comparisons when max(A) <= max(B) and
+    len(B) + #{a <= max(B)} otherwise.
+    """
+    a_values = values[_ranges(left, len_a)]
+    b_values = values[_ranges(left + len_a, len_b)]
+    a_starts = np.cumsum(len_a) - len_a
+    b_starts = np.cumsum(len_b) - len_b
+
+    max_a = np.maximum.reduceat(a_values, a_starts)
+    max_b = np.maximum.reduceat(b_values, b_starts)
+    b_below = np.add.reduceat(b_values < np.repeat(max_a, len_b), b_starts)
+    a_upto = np.add.reduceat(a_values <= np.repeat(max_b, len_a), a_starts)
+
+    comparisons = int(np.where(max_a <= max_b, len_a + b_below, len_b + a_upto).sum())
+    return comparisons, int((len_a + len_b).sum())
+
+def merge_sort_stats(data, mode: str = "top_down") -> dict:
+    """
+    Counters of MergeSortVisualizer(data, mode).merge_sort, without sorting
+    Which elements meet in a merge only depends on the split points, not on
+    the order inside each half, so all merges of one recursion level (or one
+    bottom-up pass) are evaluated at once.
+    """
+    values = np.asarray(data)
+    n = len(values)
+    comparisons = merges = 0
+
+    if mode == "bottom_up":
+        width = 1
+        while width < n:
+            left = np.arange(0, n, 2 * width, dtype=np.int64)
+            mid = np.minimum(left + width, n)
+            right = np.minimum(left + 2 * width, n)
+            paired = mid < right
+            level = _merge_level_stats(values, left[paired], (mid - left)[paired],
+                                       (right - mid)[paired])
+            comparisons, merges = comparisons + level[0], merges + level[1]
+            width *= 2
+        return {"comparisons": comparisons, "merges": merges}
+
+    left = np.array([0], dtype=np.int64)
+    right = np.array([n - 1], dtype=np.int64)
+    while True:
+        split = left < right
+        left, right = left[split], right[split]
+        if not len(left):
+            break
+        mid = (left + right) // 2
+        level = _merge_level_stats(values, left, mid - left + 1, right - mid)
+        comparisons, merges = comparisons + level[0], merges + level[1]
+        left, right = np.concatenate([left, mid + 1]), np.concatenate([mid, right])
+
+    return {"comparisons": comparisons, "merges": merges}
@@ -7,8 +7,13 @@ This is useful for testing on systems without display or when matplotlib backend
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend
 
-from bubble_sort import BubbleSortVisualizer, MergeSortVisualizer
+from bubble_sort import (BubbleSortVisualizer, MergeSortVisualizer, OperationLog,
+                         BarChartRenderer, FrameRasterizer)
+from sort_stats import bubble_sort_stats, merge_sort_stats
+import matplotlib.pyplot as plt
 import numpy as np
+import os
+import tempfile
 import time
 
 def test_without_gui():
@@ -108,6 +113,281 @@ def test_simple_case():
     print(f"Expected: {expected}")
     print(f"Both correct: {bubble_viz.data == expected and merge_viz.data == expected}")
 
+def test_operation_log():
+    """Check that frames rebuilt from the operation log match a full re-run"""
+    print("\n" + "="*50)
+    print("OPERATION LOG TEST")
+    print("="*50)
+    
+    data = [64, 34, 25, 12, 22, 11, 90, 5, 77, 34]
+    
+    bubble_viz = BubbleSortVisualizer(data.copy())
+    bubble_log = bubble_viz.bubble_sort()
+    bubble_frames = list(bubble_log)
+    print(f"Bubble Sort: {len(bubble_log)} frames from {bubble_log.nbytes} bytes of events")
+    
+    assert isinstance(bubble_log, OperationLog)
+    assert len(bubble_frames) == len(bubble_log) == 2 * bubble_viz.comparisons
+    assert bubble_frames[0] == (data, 0, -1)
+    assert bubble_frames[-1][0] == sorted(data)
+    assert sum(1 for _, _, swap_idx in bubble_frames if swap_idx >= 0) == bubble_viz.swaps
+    
+    merge_viz = MergeSortVisualizer(data.copy())
+    merge_log = merge_viz.merge_sort()
+    merge_frames = list(merge_log)
+    print(f"Merge Sort: {len(merge_log)} frames from {merge_log.nbytes} bytes of events")
+    
+    assert len(merge_frames) == len(merge_log)
+    assert merge_frames[0] == (data, 0, 1, 0)
+    assert merge_frames[-1] == (sorted(data), -1, -1, -1)
+    assert sum(1 for frame in merge_frames if frame[1] >= 0) == merge_viz.comparisons
+    
+    # Iterating twice must give the same frames (logs are replayable)
+    assert list(merge_log) == merge_frames
+    print("Operation log frames verified")
+
+def test_streaming_frames():
+    """Check that the lazy frame stream matches the recorded log"""
+    print("\n" + "="*50)
+    print("STREAMING FRAMES TEST")
+    print("="*50)
+    
+    data = list(np.random.randint(1, 100, 30))
+    
+    for visualizer_class in (BubbleSortVisualizer, MergeSortVisualizer):
+        recorded = list(visualizer_class(data.copy()).record_steps())
+        
+        streaming_viz = visualizer_class(data.copy())
+        stream = streaming_viz.stream_frames()
+        first_frame = next(stream)
+        # Nothing beyond the first step has run yet
+        assert streaming_viz.comparisons == 1
+        streamed = [first_frame] + list(stream)
+        
+        print(f"{visualizer_class.__name__}: {len(streamed)} frames streamed")
+        assert streamed == recorded
+        assert streaming_viz.data == sorted(data)
+    print("Streamed frames match the recorded log")
+
+def test_bar_chart_renderer():
+    """Check that the renderer updates bars in place instead of rebuilding them"""
+    print("\n" + "="*50)
+    print("BAR CHART RENDERER TEST")
+    print("="*50)
+    
+    data = [5, 3, 8, 1]
+    fig, ax = plt.subplots()
+    renderer = BarChartRenderer(ax, data, max(data) + 2, "Test", [('gray', 'Untouched')])
+    bars = list(renderer.bars)
+    
+    renderer.update([3, 5, 8, 1], [(0, 'blue'), (1, 'green')], "Comparisons: 1")
+    renderer.update([3, 5, 1, 8], [(2, 'blue')], "Comparisons: 2")
+    plt.close(fig)
+    
+    assert renderer.bars == bars and len(ax.patches) == len(data)
+    assert [bar.get_height() for bar in bars] == [3, 5, 1, 8]
+    assert [label.get_text() for label in renderer.labels] == ['3', '5', '1', '8']
+    assert bars[0].get_facecolor() == bars[3].get_facecolor() != bars[2].get_facecolor()
+    assert renderer.counters.get_text() == "Comparisons: 2"
+    assert len(renderer.frame_times) == 1
+    print("Bars, labels and highlights updated in place")
+
+def test_frame_rasterizer():
+    """Check the headless NumPy rasterizer and its GIF export"""
+    print("\n" + "="*50)
+    print("FRAME RASTERIZER TEST")
+    print("="*50)
+    
+    rasterizer = FrameRasterizer(4, ymax=10, width=40, height=10)
+    image = rasterizer.render([10, 5, 0, 2], [(1, 'blue'), (3, 'green')])
+    
+    assert image.shape == (10, 40) and image.dtype == np.uint8
+    assert set(np.unique(image)) <= set(range(len(FrameRasterizer.PALETTE)))
+    # Bar 0 fills its columns, bar 1 is half height and blue, bar 2 is empty
+    assert (image[:, 5] == FrameRasterizer.COLOR_INDEX['gray']).all()
+    assert (image[5:, 15] == FrameRasterizer.COLOR_INDEX['blue']).all() and (image[:5, 15] == 0).all()
+    assert (image[:, 25] == 0).all()
+    assert (image[8:, 35] == FrameRasterizer.COLOR_INDEX['green']).all()
+    
+    data = [64, 34, 25, 12, 22, 11, 90]
+    merge_viz = MergeSortVisualizer(data)
+    frames = merge_viz.merge_sort()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, "merge.gif")
+        assert merge_viz.create_animation(frames, save_gif=True, filename=filename,
+                                          renderer="numpy") is None
+        from PIL import Image
+        with Image.open(filename) as gif:
+            print(f"Exported {gif.n_frames} GIF frames for {len(frames)} sort frames")
+            assert gif.size == (800, 500) and gif.n_frames == len(frames)
+    print("Rasterizer output verified")
+
+def test_parallel_export():
+    """Check that the process pool export writes the same bytes as the serial one"""
+    print("\n" + "="*50)
+    print("PARALLEL EXPORT TEST")
+    print("="*50)
+    
+    data = list(np.random.randint(1, 1000, 40))
+    bubble_viz = BubbleSortVisualizer(data)
+    frames = list(bubble_viz.bubble_sort())[:300]
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        serial = os.path.join(tmpdir, "serial.gif")
+        parallel = os.path.join(tmpdir, "parallel.gif")
+        bubble_viz.export_gif(frames, serial)
+        bubble_viz.export_gif(frames, parallel, workers=2)
+        with open(serial, 'rb') as f1, open(parallel, 'rb') as f2:
+            assert f1.read() == f2.read()
+    print("Parallel export is byte-identical to the serial export")
+
+def test_frame_budget():
+    """Check that frame budgets keep a representative subset of the frames"""
+    print("\n" + "="*50)
+    print("FRAME BUDGET TEST")
+    print("="*50)
+    
+    data = list(np.random.randint(1, 1000, 60))
+    
+    for visualizer_class, sort_name in ((BubbleSortVisualizer, "bubble_sort"),
+                                        (MergeSortVisualizer, "merge_sort")):
+        all_frames = list(getattr(visualizer_class(data.copy()), sort_name)())
+        
+        budget_viz = visualizer_class(data.copy())
+        sampled = getattr(budget_viz, sort_name)(max_frames=100)
+        frames = list(sampled)
+        streamed = list(visualizer_class(data.copy()).stream_frames(max_frames=100))
+        timed = getattr(visualizer_class(data.copy()), sort_name)(duration=4, fps=5)
+        
+        print(f"{visualizer_class.__name__}: {len(all_frames)} frames -> "
+              f"{len(frames)} recorded, {len(streamed)} streamed, {len(timed)} for 4s at 5 fps")
+        assert len(frames) == len(sampled) <= 100 and len(streamed) <= 100 and len(timed) <= 20
+        # The counters still cover the whole sort and the animation ends sorted
+        full_viz = visualizer_class(data.copy())
+        full_viz.record_steps()
+        assert budget_viz.comparisons == full_viz.comparisons
+        assert frames[-1] == streamed[-1] == all_frames[-1]
+        assert frames[-1][0] == sorted(data)
+        
+        # Kept frames appear in the same order as in the full animation
+        remaining = iter(all_frames)
+        assert all(any(frame == other for other in remaining) for frame in frames)
+    print("Frame budgets respected")
+
+def test_sort_stats():
+    """Check the frame-free counters against the visualizers' counters"""
+    print("\n" + "="*50)
+    print("SORT STATS TEST")
+    print("="*50)
+    
+    test_cases = [
+        [],
+        [1],
+        [64, 34, 25, 12, 22, 11, 90],
+        [1, 2, 3, 4, 5],
+        [5, 4, 3, 2, 1],
+        [3, 3, 3, 3],
+        list(np.random.randint(1, 5, 33)),
+        list(np.random.randint(1, 1000, 128)),
+    ]
+    
+    for data in test_cases:
+        bubble_viz = BubbleSortVisualizer(data)
+        bubble_viz.bubble_sort()
+        merge_viz = MergeSortVisualizer(data)
+        merge_viz.merge_sort()
+        
+        bubble_stats = bubble_sort_stats(data)
+        merge_stats = merge_sort_stats(data)
+        print(f"Size {len(data):>3}: bubble {bubble_stats}, merge {merge_stats}")
+        
+        assert bubble_stats["comparisons"] == bubble_viz.comparisons
+        assert bubble_stats["swaps"] == bubble_viz.swaps
+        assert merge_stats["comparisons"] == merge_viz.comparisons
+        assert merge_stats["merges"] == merge_viz.merges
+    
+    # Large arrays are only practical without the visualizers
+    start_time = time.time()
+    large = np.random.randint(1, 1000, 200_000)
+    bubble_stats = bubble_sort_stats(large)
+    merge_stats = merge_sort_stats(large)
+    print(f"Size 200000 in {time.time() - start_time:.2f}s: bubble {bubble_stats}, merge {merge_stats}")
+    assert bubble_stats["swaps"] <= bubble_stats["comparisons"] <= len(large) * (len(large) - 1) // 2
+    print("Frame-free counters match the visualizers")
+
+def test_bottom_up_merge_sort():
+    """Check the bottom-up merge sort engine against the frame-free counters"""
+    print("\n" + "="*50)
+    print("BOTTOM-UP MERGE SORT TEST")
+    print("="*50)
+    
+    for size in (0, 1, 7, 33, 128):
+        data = list(np.random.randint(1, 50, size))
+        merge_viz = MergeSortVisualizer(data, mode="bottom_up")
+        frames = list(merge_viz.merge_sort())
+        stats = merge_sort_stats(data, mode="bottom_up")
+        print(f"Size {size:>3}: {merge_viz.comparisons} comparisons, {merge_viz.merges} merges, "
+              f"{len(frames)} frames")
+        
+        assert merge_viz.data == sorted(data)
+        assert stats == {"comparisons": merge_viz.comparisons, "merges": merge_viz.merges}
+        assert sum(1 for frame in frames if frame[1] >= 0) == merge_viz.comparisons
+        if frames:
+            assert frames[-1] == (sorted(data), -1, -1, -1)
+    
+    try:
+        MergeSortVisualizer([3, 1, 2], mode="sideways")
+    except ValueError:
+        print("Unknown modes are rejected")
+    else:
+        assert False, "expected ValueError for an unknown mode"
+
+def test_benchmark_suite():
+    """Run a small benchmark suite and compare it with itself"""
+    print("\n" + "="*50)
+    print("BENCHMARK SUITE TEST")
+    print("="*50)
+    
+    import benchmark
+    
+    # Inputs are reproducible and have the requested shape
+    for distribution in benchmark.DISTRIBUTIONS:
+        data = benchmark.make_data(distribution, 200, seed=3)
+        assert len(data) == 200
+        assert np.array_equal(data, benchmark.make_data(distribution, 200, seed=3))
+    assert np.all(np.diff(benchmark.make_data("sorted", 200)) >= 0)
+    assert np.all(np.diff(benchmark.make_data("reversed", 200)) <= 0)
+    assert len(np.unique(benchmark.make_data("few_unique", 200))) <= 5
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        output = os.path.join(tmpdir, "results.json")
+        report = benchmark.run_suite(sizes=(10, 50), distributions=("random", "reversed"),
+                                     max_frames=5, output=output)
+        assert os.path.exists(output)
+        assert report["environment"]["python"]
+        assert len(report["results"]) == 2 * 2 * (len(benchmark.VISUALIZERS) + len(benchmark.FRAME_FREE))
+        
+        for case in report["results"]:
+            if case["algorithm"] in benchmark.VISUALIZERS:
+                assert set(case["stages"]) == {"sort", "capture", "render", "encode"}
+                assert case["frames"] > 0 and case["frame_bytes"] > 0
+                assert case["rendered_frames"] == min(case["frames"], 5)
+            else:
+                assert set(case["stages"]) == {"sort"}
+            assert all(stage["peak_bytes"] is not None for stage in case["stages"].values())
+        
+        # Counters agree between the visualized and frame-free paths
+        by_key = {(case["algorithm"], case["distribution"], case["size"]): case
+                  for case in report["results"]}
+        for (algorithm, distribution, size), case in by_key.items():
+            if algorithm in benchmark.FRAME_FREE:
+                visualized = by_key[(algorithm[:-len("_stats")], distribution, size)]
+                assert all(visualized["counters"][name] == value
+                           for name, value in case["counters"].items()
+                           if name in visualized["counters"])
+        
+        assert benchmark.compare_results(output, output, threshold=1.01) == 0
+
 if __name__ == "__main__":
     print("Sorting Algorithm Test (No GUI)")
     print("This test runs without requiring a display window")
@@ -115,6 +395,17 @@ if __name__ == "__main__":
     # Test simple case first
     test_simple_case()
     
+    # Check frame reconstruction from the operation log
+    test_operation_log()
+    test_streaming_frames()
+    test_bar_chart_renderer()
+    test_frame_rasterizer()
+    test_parallel_export()
+    test_frame_budget()
+    test_sort_stats()
+    test_bottom_up_merge_sort()
+    test_benchmark_suite()
+    
     # Test with various sizes
     test_without_gui()
     